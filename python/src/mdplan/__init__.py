@@ -2,4 +2,5 @@ from .git import *
 from .count import *
 from .parse import *
 from .task import *
+from .tokenizer import *
 from .tree import *
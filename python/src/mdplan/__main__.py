@@ -1,8 +1,15 @@
 import argparse
+import json
+import sys
 from pathlib import Path
 
-from .git.history import GitHistory
+from .git.history import ORDERS, WALKS, GitHistory
 from .git.plot import GitPlot
+from .git.serve import GitServer
+from .graph import FORMATS, write_graph
+from .index import TaskIndex
+from .parse import parse_tree
+from . import serialize
 
 description = """
 A tool for analyzing markdown plans
@@ -11,7 +18,11 @@ A tool for analyzing markdown plans
 epilog = """
 Analysis details:
 * history: parses the git history of a plan file, outputting version statistics as JSON
+  (or writing them to a binary file with --export)
 * plot: opens a browser to display a plan's history (as a burn-up chart)
+* serve: serves a plan's history (JSON) and burn-up chart over HTTP, until interrupted
+* find: searches a plan for tasks matching a query, outputting them as JSON
+* graph: outputs a plan as a graph of tasks (Graphviz DOT or Mermaid)
  
 """
 
@@ -23,22 +34,160 @@ def main():
         formatter_class=argparse.RawDescriptionHelpFormatter,
     )
     parser.add_argument(
-        "command", choices=["history", "plot"], help="the type of analysis to run"
+        "command",
+        choices=["history", "plot", "serve", "find", "graph"],
+        help="the type of analysis to run",
     )
     parser.add_argument(
         "planfile",
         type=Path,
         help="the path to a markdown plan",
     )
+    parser.add_argument(
+        "query",
+        nargs="?",
+        default="",
+        help="the text to search for (find only)",
+    )
+    parser.add_argument(
+        "--export",
+        type=Path,
+        metavar="FILE",
+        help="write history statistics to FILE in binary format, instead of JSON",
+    )
+    parser.add_argument(
+        "--sections",
+        type=int,
+        metavar="DEPTH",
+        help="also output statistics for each task down to DEPTH (history JSON only)",
+    )
+    parser.add_argument(
+        "--walk",
+        choices=WALKS,
+        default="head",
+        help="which commits to read the plan from (default: head)",
+    )
+    parser.add_argument(
+        "--order",
+        choices=ORDERS,
+        default="time",
+        help="how to order versions of the plan (default: time)",
+    )
+    parser.add_argument(
+        "--no-follow",
+        dest="follow",
+        action="store_false",
+        help="do not follow the plan file across renames",
+    )
+    parser.add_argument(
+        "--host", default="127.0.0.1", help="the address to serve on (serve only)"
+    )
+    parser.add_argument(
+        "--port", type=int, default=8000, help="the port to serve on (serve only)"
+    )
+    parser.add_argument(
+        "--match",
+        choices=["exact", "prefix", "substring"],
+        default="substring",
+        help="how the query must match a task description (default: substring)",
+    )
+    status = parser.add_mutually_exclusive_group()
+    status.add_argument(
+        "--done", dest="done", action="store_true", default=None, help="done tasks only"
+    )
+    status.add_argument(
+        "--undone",
+        dest="done",
+        action="store_false",
+        default=None,
+        help="undone tasks only",
+    )
+    parser.add_argument(
+        "--under",
+        metavar="TEXT",
+        help="only tasks under the task (e.g. a header) named TEXT, or containing it",
+    )
+    parser.add_argument(
+        "--format",
+        choices=FORMATS,
+        default="dot",
+        help="the graph syntax to output (default: dot)",
+    )
+    parser.add_argument(
+        "--collapse-done",
+        action="store_true",
+        help="leave out the sub-tasks of done tasks (graph only)",
+    )
+    parser.add_argument(
+        "--max-depth",
+        type=int,
+        metavar="DEPTH",
+        help="leave out tasks deeper than DEPTH (graph only)",
+    )
     args = parser.parse_args()
 
     if args.command == "history":
-        history = GitHistory(args.planfile)
-        print(history.to_json())
+        history = GitHistory(
+            args.planfile, walk=args.walk, order=args.order, follow=args.follow
+        )
+        if args.export:
+            serialize.dump(history, args.export)
+        else:
+            print(history.to_json(section_depth=args.sections))
     if args.command == "plot":
-        history = GitHistory(args.planfile)
+        history = GitHistory(
+            args.planfile, walk=args.walk, order=args.order, follow=args.follow
+        )
         plot = GitPlot(history)
         plot.open()
+    if args.command == "serve":
+        server = GitServer(
+            args.planfile,
+            host=args.host,
+            port=args.port,
+            walk=args.walk,
+            order=args.order,
+            follow=args.follow,
+        )
+        print(f"Serving {args.planfile} on {server.url}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+    if args.command == "find":
+        tree = parse_tree(args.planfile.read_text())
+        index = TaskIndex(tree)
+        under = None
+        if args.under:
+            # an exact match wins over tasks that merely contain the text
+            parents = index.exact(args.under) or index.substring(args.under)
+            if len(parents) != 1:
+                sys.exit(
+                    f"Expected one task containing '{args.under}', found {len(parents)}"
+                )
+            under = parents[0]
+        lookup = getattr(index, args.match)
+        nodes = lookup(args.query, done=args.done, under=under)
+        tasks = [
+            {
+                "description": node.value.description,
+                "done": index.is_done(node),
+                "dependencies": node.value.dependencies,
+            }
+            for node in nodes
+        ]
+        print(json.dumps(tasks))
+    if args.command == "graph":
+        tree = parse_tree(args.planfile.read_text())
+        write_graph(
+            tree,
+            sys.stdout,
+            format=args.format,
+            collapse_done=args.collapse_done,
+            max_depth=args.max_depth,
+        )
 
 
 if __name__ == "__main__":
@@ -1,24 +1,37 @@
-from typing import Optional
+from dataclasses import dataclass
 
 from .tree import Node, Tree
 from .task import Task
 from .parse import parse_tree
 
 
+@dataclass
+class TaskStatistics:
+    total: int
+    completed: int
+
+    @property
+    def remaining(self) -> int:
+        return self.total - self.completed
+
+    def as_data(self):
+        data = {"total": self.total, "completed": self.completed}
+        return data
+
+
 def trickle_completion(tree: Tree[Task]):
     """
     Trickle-down completion from parent to children.
     If a node is done, all its progeny are also marked done.
     """
 
-    def recurse(node: Node[Task], done: Optional[bool] = None):
-        if done:
-            node.value.done = True
+    stack = list(tree.roots)
+    while stack:
+        node = stack.pop()
         for child in node.children:
-            recurse(child, done=node.value.done)
-
-    for root in tree.roots:
-        recurse(root)
+            if node.value.done:
+                child.value.done = True
+            stack.append(child)
 
 
 def count_all_tasks(plan):
@@ -31,3 +44,70 @@ def count_remaining_tasks(plan):
     trickle_completion(tree)
     remaining_tasks = [leaf.value for leaf in tree.leaves if not leaf.value.done]
     return len(remaining_tasks)
+
+
+def rollup(tree: Tree[Task]) -> dict[Node[Task], TaskStatistics]:
+    """
+    Counts the tasks (leaves) under every node of the tree.
+    A leaf is completed if it, or any of its ancestors, is done.
+    A leaf counts itself, so its statistics are 1 total and 0 or 1 completed.
+    """
+    # pre-order, so that reversed, every node comes after all its progeny
+    order = []
+    stack = [(root, False) for root in tree.roots]
+    while stack:
+        node, ancestor_done = stack.pop()
+        done = ancestor_done or node.value.done
+        order.append((node, done))
+        stack.extend((child, done) for child in node.children)
+
+    totals = {}
+    completions = {}
+    for node, done in reversed(order):
+        if not node.children:
+            totals[node] = 1
+            completions[node] = int(done)
+        if node.parent is not None:
+            parent = node.parent
+            totals[parent] = totals.get(parent, 0) + totals[node]
+            completions[parent] = completions.get(parent, 0) + completions[node]
+    return {
+        node: TaskStatistics(total=totals[node], completed=completions[node])
+        for node, _ in order
+    }
+
+
+def count_tasks(tree: Tree[Task]) -> TaskStatistics:
+    statistics = rollup(tree)
+    roots = [statistics[root] for root in tree.roots]
+    total = sum(s.total for s in roots)
+    completed = sum(s.completed for s in roots)
+    return TaskStatistics(total=total, completed=completed)
+
+
+Section = tuple[str, ...]  # descriptions from a root down to the section
+
+
+def section_statistics(tree: Tree[Task], depth: int) -> dict[Section, TaskStatistics]:
+    """
+    Returns statistics for every node up to the given depth (roots are depth 1),
+    e.g. for each header and top-level task.
+    Sections with the same path are counted together.
+    """
+    statistics = rollup(tree)
+    sections = {}
+    stack = [(root, (root.value.description,)) for root in tree.roots]
+    while stack:
+        node, path = stack.pop()
+        s = statistics[node]
+        if path in sections:
+            s = TaskStatistics(
+                total=sections[path].total + s.total,
+                completed=sections[path].completed + s.completed,
+            )
+        sections[path] = s
+        if len(path) < depth:
+            stack.extend(
+                (child, path + (child.value.description,)) for child in node.children
+            )
+    return sections
@@ -1,6 +1,6 @@
-from dataclasses import dataclass
 from collections.abc import Sequence
 from datetime import datetime, timedelta, timezone
+from functools import lru_cache
 from pathlib import Path
 from typing import Optional
 import pygit2
@@ -9,17 +9,8 @@ import json
 from ..tree import Tree
 from ..task import Task
 from ..parse import parse_tree
-from ..count import count_all_tasks, count_remaining_tasks
-
-
-@dataclass
-class TaskStatistics:
-    total: int
-    completed: int
-
-    def as_data(self):
-        data = {"total": self.total, "completed": self.completed}
-        return data
+from ..count import TaskStatistics, count_tasks, section_statistics
+from ..persistent import PersistentTree, freeze
 
 
 class GitVersion:
@@ -37,6 +28,13 @@ class GitVersion:
     def tree(self) -> Tree[Task]:
         return parse_tree(self.source)
 
+    @property
+    def persistent_tree(self) -> PersistentTree:
+        """
+        An immutable tree, sharing unchanged subtrees with other versions
+        """
+        return freeze(self.tree)
+
     @property
     def datetime(self) -> datetime:
         timestamp = self.commit.commit_time
@@ -46,15 +44,23 @@ class GitVersion:
 
     @property
     def task_statistics(self) -> TaskStatistics:
-        total = count_all_tasks(self.source)
-        completed = total - count_remaining_tasks(self.source)
-        return TaskStatistics(total=total, completed=completed)
+        return count_tasks(self.tree)
+
+    def section_statistics(self, depth: int) -> dict[tuple[str, ...], TaskStatistics]:
+        return section_statistics(self.tree, depth)
 
-    def as_data(self):
+    def as_data(self, section_depth: Optional[int] = None):
+        tree = self.tree
         data = {
             "date": self.datetime.isoformat(),
-            "tasks": self.task_statistics.as_data(),
+            "tasks": count_tasks(tree).as_data(),
         }
+        if section_depth:
+            sections = section_statistics(tree, section_depth)
+            data["sections"] = [
+                {"section": list(path), "tasks": sections[path].as_data()}
+                for path in sorted(sections)
+            ]
         return data
 
 
@@ -70,14 +76,70 @@ def find_closest_repo(path: Path):
     raise Exception("Could not find a git repo containing '{path}'")
 
 
+WALKS = ["head", "first-parent", "all-refs"]
+ORDERS = ["time", "topological"]
+
+
+def walk_commits(repo: pygit2.Repository, walk="head"):
+    """
+    Walks the commits of a repo, children before their parents
+    (so a plan can be followed back through renames).
+
+    Walks:
+    * head: every commit reachable from HEAD
+    * first-parent: only the mainline of HEAD, skipping merged-in branches
+    * all-refs: every commit reachable from any branch, tag or other ref
+    """
+    if walk not in WALKS:
+        raise ValueError(f"Unknown walk: '{walk}'")
+    walker = repo.walk(repo.head.target, pygit2.GIT_SORT_TOPOLOGICAL)
+    if walk == "first-parent":
+        walker.simplify_first_parent()
+    if walk == "all-refs":
+        for name in repo.references:
+            try:
+                commit = repo.references[name].peel(pygit2.Commit)
+            except (ValueError, pygit2.GitError):
+                continue  # e.g. a tag of a tree or blob
+            walker.push(commit.id)
+    return walker
+
+
+RENAME_CACHE_SIZE = 1024
+
+
+@lru_cache(maxsize=RENAME_CACHE_SIZE)
+def find_renames(repo: Path, parent: str, child: str) -> dict[str, str]:
+    """
+    Returns the files renamed from a parent commit to its child (new path: old path).
+    This diffs the whole tree with similarity detection, so results are cached.
+    """
+    repository = pygit2.Repository(repo)
+    diff = repository.diff(repository[parent], repository[child])
+    diff.find_similar()
+    return {
+        delta.new_file.path: delta.old_file.path
+        for delta in diff.deltas
+        if delta.status == pygit2.GIT_DELTA_RENAMED
+    }
+
+
 class GitHistory(Sequence):
     plan: Path
     repo: Path
+    walk: str
+    order: str
+    follow: bool
     versions: list[GitVersion]
 
-    def __init__(self, planfile):
+    def __init__(self, planfile, walk="head", order="time", follow=True):
+        if order not in ORDERS:
+            raise ValueError(f"Unknown order: '{order}'")
         self.plan = Path(planfile).absolute()
         self.repo = find_closest_repo(self.plan)
+        self.walk = walk
+        self.order = order
+        self.follow = follow
         self.find_versions()
 
         super().__init__()
@@ -88,32 +150,71 @@ class GitHistory(Sequence):
     def __len__(self):
         return len(self.versions)
 
-    def read_source_from_commit(self, commit: pygit2.Commit) -> Optional[str]:
+    def read_source_from_commit(
+        self, commit: pygit2.Commit, relpath: Optional[str] = None
+    ) -> Optional[str]:
         tree = commit.tree
-        relpath = self.plan.relative_to(self.repo)
+        if relpath is None:
+            relpath = self.plan.relative_to(self.repo).as_posix()
         try:
-            blob = tree[str(relpath)]
+            blob = tree[relpath]
             if blob:
                 return blob.data.decode("utf-8")
         except:
             pass
 
+    def find_parent_path(
+        self, commit: pygit2.Commit, parent: pygit2.Commit, relpath: str
+    ) -> str:
+        """
+        Returns where the plan is in a parent commit, given where it is in the child.
+        Renames are only looked for when the path disappears, i.e. when the child
+        has the plan but the parent does not. Like `git log --follow`, the same
+        path is kept when the plan was added without being renamed, so earlier
+        versions (e.g. before a deletion) are still found.
+        """
+        if not self.follow or relpath in parent.tree or relpath not in commit.tree:
+            return relpath
+        renames = find_renames(self.repo, str(parent.id), str(commit.id))
+        return renames.get(relpath, relpath)
+
     def find_versions(self):
         self.versions = []
         repo = pygit2.Repository(self.repo)
-        for commit in repo.walk(repo.head.target):
-            source = self.read_source_from_commit(commit)
+        paths = {}  # where the plan is in each commit, as found from its children
+        relpath = self.plan.relative_to(self.repo).as_posix()
+        commits = walk_commits(repo, self.walk)
+        for commit in commits:
+            path = paths.pop(commit.id, relpath)
+            source = self.read_source_from_commit(commit, path)
             if source:
                 version = GitVersion(commit, source)
                 self.versions.append(version)
-        self.versions.sort(key=lambda v: v.datetime)
-
-    def to_json(self) -> str:
+            parents = commit.parents
+            if self.walk == "first-parent":
+                parents = parents[:1]
+            for parent in parents:
+                known = paths.get(parent.id)
+                if known is not None and known in parent.tree:
+                    continue  # another child already found the plan in this parent
+                parent_path = self.find_parent_path(commit, parent, path)
+                if known is None or parent_path in parent.tree:
+                    paths[parent.id] = parent_path
+        self.versions.reverse()
+        if self.order == "time":
+            self.versions.sort(key=lambda v: v.datetime)
+
+    def to_json(self, section_depth: Optional[int] = None) -> str:
+        """
+        Returns statistics for each version as JSON.
+        If section_depth is given, each version also has statistics for every
+        section up to that depth (see count.section_statistics).
+        """
         version_jsons = []
 
         for version in self.versions:
             try:
-                json_txt = version.as_data()
+                json_txt = version.as_data(section_depth)
                 version_jsons.append(json_txt)
             except Exception as e:
                 # Just ignore it as a bad commit.
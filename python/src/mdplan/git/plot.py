@@ -26,7 +26,13 @@ class GitPlot:
         self.history = history
 
     def to_html(self) -> str:
-        text = self.history.to_json()
+        return self.render(self.history.to_json())
+
+    @classmethod
+    def render(cls, text: str) -> str:
+        """
+        Renders the plot page from history JSON (see GitHistory.to_json)
+        """
         data = json.loads(text)
 
         def to_total(v):
@@ -45,7 +51,7 @@ class GitPlot:
         stacked = list(totals + completions)
         values = json.dumps(stacked)
 
-        template = self.template_path.read_text()
+        template = cls.template_path.read_text()
         html = template.replace("{{values}}", values)
         return html
 
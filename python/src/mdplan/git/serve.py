@@ -0,0 +1,150 @@
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from threading import Lock
+from typing import Optional
+import hashlib
+import json
+import pygit2
+
+from .history import GitHistory, find_closest_repo
+from .plot import GitPlot
+
+CacheKey = tuple[str, Optional[str]]  # HEAD (or all refs) and plan blob oid
+
+
+def hash_refs(repo: pygit2.Repository) -> str:
+    targets = sorted(
+        f"{name} {repo.references[name].target}" for name in repo.references
+    )
+    return hashlib.sha1("\n".join(targets).encode("utf-8")).hexdigest()
+
+
+class Response:
+    body: bytes
+    content_type: str
+    etag: str
+
+    def __init__(self, body: str, content_type: str, etag: str):
+        self.body = body.encode("utf-8")
+        self.content_type = content_type
+        self.etag = etag
+
+
+class HistoryCache:
+    """
+    Keeps the rendered endpoints for the latest state of a repo.
+    Everything is recomputed only when HEAD or the plan itself changes
+    (or any ref, when walking all refs).
+    """
+
+    plan: Path
+    repo: Path
+    key: Optional[CacheKey]
+    responses: dict[str, Response]
+
+    def __init__(self, planfile, walk="head", order="time", follow=True):
+        self.plan = Path(planfile).absolute()
+        self.repo = find_closest_repo(self.plan)
+        self.relpath = self.plan.relative_to(self.repo)
+        self.walk = walk
+        self.order = order
+        self.follow = follow
+        self.key = None
+        self.responses = {}
+        self.lock = Lock()
+
+    def current_key(self) -> CacheKey:
+        repo = pygit2.Repository(self.repo)
+        commit = repo.head.peel(pygit2.Commit)
+        try:
+            blob = str(commit.tree[str(self.relpath)].id)
+        except KeyError:
+            blob = None
+        if self.walk == "all-refs":
+            return (hash_refs(repo), blob)
+        return (str(commit.id), blob)
+
+    def render(self, key: CacheKey) -> dict[str, Response]:
+        history = GitHistory(
+            self.plan, walk=self.walk, order=self.order, follow=self.follow
+        )
+        text = history.to_json()
+        versions = json.loads(text)["versions"]
+        statistics = json.dumps(versions[-1] if versions else None)
+        etag = '"{}-{}"'.format(*key)
+        responses = {
+            "/history": Response(text, "application/json", etag),
+            "/statistics": Response(statistics, "application/json", etag),
+        }
+        if versions:
+            html = GitPlot.render(text)
+            responses["/plot"] = Response(html, "text/html; charset=utf-8", etag)
+            responses["/"] = responses["/plot"]
+        return responses
+
+    def get(self, path: str) -> Optional[Response]:
+        with self.lock:
+            key = self.current_key()
+            if key != self.key:
+                self.responses = self.render(key)
+                self.key = key
+            return self.responses.get(path)
+
+
+class GitRequestHandler(BaseHTTPRequestHandler):
+    server: "GitServer"
+
+    def respond(self, include_body: bool):
+        path = self.path.split("?")[0]
+        response = self.server.cache.get(path)
+        if response is None:
+            self.send_error(HTTPStatus.NOT_FOUND)
+            return
+        if response.etag in self.headers.get("If-None-Match", ""):
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self.send_header("ETag", response.etag)
+            self.end_headers()
+            return
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", response.content_type)
+        self.send_header("Content-Length", str(len(response.body)))
+        self.send_header("ETag", response.etag)
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        if include_body:
+            self.wfile.write(response.body)
+
+    def do_GET(self):
+        self.respond(include_body=True)
+
+    def do_HEAD(self):
+        self.respond(include_body=False)
+
+
+class GitServer(ThreadingHTTPServer):
+    """
+    Serves a plan's history over HTTP:
+    * /history: version statistics as JSON (see GitHistory.to_json)
+    * /statistics: the latest version's statistics as JSON
+    * /plot: the burn-up chart page (also served at /)
+    """
+
+    cache: HistoryCache
+
+    def __init__(
+        self,
+        planfile,
+        host: str = "127.0.0.1",
+        port: int = 8000,
+        walk="head",
+        order="time",
+        follow=True,
+    ):
+        self.cache = HistoryCache(planfile, walk=walk, order=order, follow=follow)
+        super().__init__((host, port), GitRequestHandler)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
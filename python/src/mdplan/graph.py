@@ -0,0 +1,130 @@
+"""
+Exports a plan as a graph of tasks, in Graphviz DOT or Mermaid syntax.
+
+Lines are generated one at a time, so large plans can be written straight to a
+file. Parent tasks point to their sub-tasks, and dependencies (`@(...)`) are
+drawn as dashed edges from the dependency to the task that depends on it.
+"""
+
+from typing import Iterator, Optional, TextIO
+
+from .index import TaskIndex
+from .task import Task
+from .tree import Tree
+
+FORMATS = ["dot", "mermaid"]
+
+
+class DotFormat:
+    def header(self) -> Iterator[str]:
+        yield "digraph plan {"
+        yield "  node [shape=box];"
+
+    def node(self, id: str, task: Task, done: bool) -> str:
+        label = task.description.replace("\\", "\\\\").replace('"', '\\"')
+        style = ", color=gray, fontcolor=gray" if done else ""
+        return f'  {id} [label="{label}"{style}];'
+
+    def edge(self, source: str, target: str, dependency: bool) -> str:
+        style = " [style=dashed]" if dependency else ""
+        return f"  {source} -> {target}{style};"
+
+    def comment(self, text: str) -> str:
+        return f"  // {text}"
+
+    def footer(self) -> Iterator[str]:
+        yield "}"
+
+
+class MermaidFormat:
+    def header(self) -> Iterator[str]:
+        yield "flowchart TD"
+        yield "  classDef done color:gray,stroke:gray;"
+
+    def node(self, id: str, task: Task, done: bool) -> str:
+        label = task.description.replace('"', "#quot;")
+        style = ":::done" if done else ""
+        return f'  {id}["{label}"]{style}'
+
+    def edge(self, source: str, target: str, dependency: bool) -> str:
+        arrow = "-.->" if dependency else "-->"
+        return f"  {source} {arrow} {target}"
+
+    def comment(self, text: str) -> str:
+        return f"  %% {text}"
+
+    def footer(self) -> Iterator[str]:
+        yield from []
+
+
+def graph_lines(
+    tree: Tree[Task],
+    format: str = "dot",
+    collapse_done: bool = False,
+    max_depth: Optional[int] = None,
+) -> Iterator[str]:
+    """
+    Yields the lines of a graph of the tree.
+
+    If collapse_done is set, the sub-tasks of done tasks are left out.
+    If max_depth is given, tasks deeper than it are left out (roots are depth 1).
+    Dependencies on left out tasks point to their closest shown ancestor instead.
+    A task counts as done if it, or any of its ancestors, is marked done.
+    """
+    if format == "dot":
+        out = DotFormat()
+    elif format == "mermaid":
+        out = MermaidFormat()
+    else:
+        raise ValueError(f"Unknown format: '{format}'")
+
+    yield from out.header()
+
+    ids = {}  # every task's id, or its closest shown ancestor's id if left out
+    dependents = []
+    # siblings are pushed in reverse, so they are popped in document order
+    stack = [(root, None, 1, False) for root in reversed(tree.in_order(tree.roots))]
+    while stack:
+        node, parent_id, depth, ancestor_done = stack.pop()
+        done = ancestor_done or node.value.done
+        hidden = parent_id is not None and (
+            (collapse_done and ancestor_done)
+            or (max_depth is not None and depth > max_depth)
+        )
+        if hidden:
+            ids[node] = parent_id
+        else:
+            ids[node] = f"t{len(ids)}"
+            yield out.node(ids[node], node.value, done)
+            if parent_id is not None:
+                yield out.edge(parent_id, ids[node], dependency=False)
+        if node.value.dependencies:
+            dependents.append(node)
+        children = reversed(tree.in_order(node.children))
+        stack.extend((child, ids[node], depth + 1, done) for child in children)
+
+    if dependents:
+        index = TaskIndex(tree)
+        edges = set()
+        for node in dependents:
+            for dependency in node.value.dependencies:
+                matches = [m for m in index.substring(dependency) if m is not node]
+                if len(matches) != 1:
+                    reason = "ambiguous" if matches else "unknown"
+                    yield out.comment(f"{reason} dependency: {dependency}")
+                    continue
+                edge = (ids[matches[0]], ids[node])
+                if edge[0] != edge[1] and edge not in edges:
+                    edges.add(edge)
+                    yield out.edge(*edge, dependency=True)
+
+    yield from out.footer()
+
+
+def write_graph(tree: Tree[Task], file: TextIO, **options):
+    """
+    Writes a graph of the tree to a text file (see graph_lines for options).
+    """
+    for line in graph_lines(tree, **options):
+        file.write(line)
+        file.write("\n")
@@ -0,0 +1,128 @@
+from bisect import bisect_left
+from typing import Iterable, Optional
+
+from .task import Task
+from .tree import Node, Tree
+
+NGRAM = 3
+
+
+def ngrams(text: str) -> set[str]:
+    return {text[i : i + NGRAM] for i in range(len(text) - NGRAM + 1)}
+
+
+class TaskIndex:
+    """
+    Looks up tasks in a tree by their descriptions.
+
+    Every lookup can be filtered by completion and by an ancestor task.
+    A task counts as done if it, or any of its ancestors, is marked done.
+    """
+
+    nodes: list[Node[Task]]
+
+    def __init__(self, tree: Tree[Task]):
+        # pre-order positions in document order, so the tasks under a node
+        # form a range and lookups return tasks in the order they are written
+        self.nodes = []
+        self.done = []
+        self.positions = {}
+        stack = [(root, False) for root in reversed(tree.in_order(tree.roots))]
+        while stack:
+            node, ancestor_done = stack.pop()
+            self.positions[node] = len(self.nodes)
+            self.nodes.append(node)
+            done = ancestor_done or node.value.done
+            self.done.append(done)
+            children = reversed(tree.in_order(node.children))
+            stack.extend((child, done) for child in children)
+        # the tasks under the node at position p are at positions p+1 to ends[p]-1
+        self.ends = list(range(1, len(self.nodes) + 1))
+        for position in reversed(range(len(self.nodes))):
+            parent = self.nodes[position].parent
+            if parent is not None:
+                p = self.positions[parent]
+                self.ends[p] = max(self.ends[p], self.ends[position])
+
+        self.by_description = {}
+        for position, node in enumerate(self.nodes):
+            description = node.value.description
+            self.by_description.setdefault(description, []).append(position)
+        self.descriptions = sorted(self.by_description)
+        self.by_ngram = {}
+        for i, description in enumerate(self.descriptions):
+            for ngram in ngrams(description):
+                self.by_ngram.setdefault(ngram, set()).add(i)
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def is_done(self, node: Node[Task]) -> bool:
+        return self.done[self.positions[node]]
+
+    def select(
+        self,
+        descriptions: Iterable[str],
+        done: Optional[bool] = None,
+        under: Optional[Node[Task]] = None,
+    ) -> list[Node[Task]]:
+        positions = []
+        for description in descriptions:
+            positions.extend(self.by_description[description])
+        if under is not None:
+            start = self.positions[under] + 1
+            end = self.ends[start - 1]
+            positions = [p for p in positions if start <= p < end]
+        if done is not None:
+            positions = [p for p in positions if self.done[p] == done]
+        positions.sort()
+        return [self.nodes[p] for p in positions]
+
+    def exact(
+        self,
+        description: str,
+        done: Optional[bool] = None,
+        under: Optional[Node[Task]] = None,
+    ) -> list[Node[Task]]:
+        """
+        Returns tasks whose description is exactly the given text.
+        """
+        if description not in self.by_description:
+            return []
+        return self.select([description], done=done, under=under)
+
+    def prefix(
+        self,
+        prefix: str,
+        done: Optional[bool] = None,
+        under: Optional[Node[Task]] = None,
+    ) -> list[Node[Task]]:
+        """
+        Returns tasks whose description starts with the given text.
+        """
+        matches = []
+        i = bisect_left(self.descriptions, prefix)
+        while i < len(self.descriptions) and self.descriptions[i].startswith(prefix):
+            matches.append(self.descriptions[i])
+            i += 1
+        return self.select(matches, done=done, under=under)
+
+    def substring(
+        self,
+        text: str,
+        done: Optional[bool] = None,
+        under: Optional[Node[Task]] = None,
+    ) -> list[Node[Task]]:
+        """
+        Returns tasks whose description contains the given text.
+        """
+        if len(text) < NGRAM:
+            candidates = self.descriptions
+        else:
+            postings = sorted(
+                (self.by_ngram.get(ngram, set()) for ngram in ngrams(text)), key=len
+            )
+            indexes = set.intersection(*postings)
+            candidates = [self.descriptions[i] for i in indexes]
+        matches = [description for description in candidates if text in description]
+        return self.select(matches, done=done, under=under)
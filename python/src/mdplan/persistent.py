@@ -0,0 +1,205 @@
+"""
+Immutable trees whose unchanged subtrees are shared between versions.
+
+Every node is identified by a hash of its task and its children's hashes.
+Freezing a tree reuses any node with the same hash that is still alive,
+so many versions of a plan only take memory for the parts that changed,
+and comparing two subtrees is a single hash comparison.
+"""
+
+from hashlib import blake2b
+from typing import Iterator, Optional, Sequence
+from weakref import WeakValueDictionary
+
+from .count import Section
+from .task import Task
+from .tree import Node, Tree
+
+DIGEST_SIZE = 16
+
+
+def hash_task(task: Task, child_digests: list[bytes]) -> bytes:
+    h = blake2b(digest_size=DIGEST_SIZE)
+    h.update(b"\x01" if task.done else b"\x00")
+    h.update(len(task.dependencies).to_bytes(4, "little"))
+    for text in [task.description, *task.dependencies]:
+        data = text.encode("utf-8")
+        h.update(len(data).to_bytes(4, "little"))
+        h.update(data)
+    for digest in sorted(child_digests):
+        h.update(digest)
+    return h.digest()
+
+
+class PersistentNode:
+    """
+    An immutable task and its subtree.
+    Children are ordered by digest, since a plan's sibling order is not kept.
+    """
+
+    __slots__ = (
+        "description",
+        "done",
+        "dependencies",
+        "children",
+        "digest",
+        "__weakref__",
+    )
+
+    description: str
+    done: bool
+    dependencies: tuple[str, ...]
+    children: tuple["PersistentNode", ...]
+    digest: bytes
+
+    def __init__(self, task: Task, children, digest: bytes):
+        set_ = object.__setattr__
+        set_(self, "description", task.description)
+        set_(self, "done", task.done)
+        set_(self, "dependencies", tuple(task.dependencies))
+        set_(self, "children", tuple(sorted(children, key=lambda c: c.digest)))
+        set_(self, "digest", digest)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("PersistentNode is immutable")
+
+    def __eq__(self, other):
+        if not isinstance(other, PersistentNode):
+            return NotImplemented
+        return self.digest == other.digest
+
+    def __hash__(self):
+        return hash(self.digest)
+
+    @property
+    def task(self) -> Task:
+        return Task(
+            description=self.description,
+            done=self.done,
+            dependencies=list(self.dependencies),
+        )
+
+    def child(self, description: str) -> Optional["PersistentNode"]:
+        for child in self.children:
+            if child.description == description:
+                return child
+        return None
+
+
+class NodeStore:
+    """
+    Hands out one shared node per digest, for as long as any tree uses it
+    """
+
+    nodes: "WeakValueDictionary[bytes, PersistentNode]"
+
+    def __init__(self):
+        self.nodes = WeakValueDictionary()
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def node(self, task: Task, children: list[PersistentNode]) -> PersistentNode:
+        digest = hash_task(task, [child.digest for child in children])
+        node = self.nodes.get(digest)
+        if node is None:
+            node = PersistentNode(task, children, digest)
+            self.nodes[digest] = node
+        return node
+
+    def freeze(self, tree: Tree[Task]) -> "PersistentTree":
+        # pre-order, so that reversed, every node comes after all its progeny
+        order = []
+        stack = list(tree.roots)
+        while stack:
+            node = stack.pop()
+            order.append(node)
+            stack.extend(node.children)
+
+        frozen = {}
+        for node in reversed(order):
+            children = [frozen.pop(child) for child in node.children]
+            frozen[node] = self.node(node.value, children)
+        return PersistentTree([frozen[root] for root in tree.roots])
+
+
+DEFAULT_STORE = NodeStore()
+
+
+def freeze(tree: Tree[Task], store: NodeStore = DEFAULT_STORE) -> "PersistentTree":
+    return store.freeze(tree)
+
+
+class PersistentTree:
+    """
+    An immutable version of a Tree[Task]
+    """
+
+    roots: tuple[PersistentNode, ...]
+    digest: bytes
+
+    def __init__(self, roots: list[PersistentNode]):
+        self.roots = tuple(sorted(roots, key=lambda r: r.digest))
+        h = blake2b(digest_size=DIGEST_SIZE)
+        for root in self.roots:
+            h.update(root.digest)
+        self.digest = h.digest()
+
+    def __eq__(self, other):
+        if not isinstance(other, PersistentTree):
+            return NotImplemented
+        return self.digest == other.digest
+
+    def __hash__(self):
+        return hash(self.digest)
+
+    def subtree(self, path: Sequence[str]) -> Optional[PersistentNode]:
+        """
+        Returns the node at the given path of descriptions, if there is one
+        """
+        if not path:
+            return None
+        node = next((r for r in self.roots if r.description == path[0]), None)
+        for description in path[1:]:
+            if node is None:
+                break
+            node = node.child(description)
+        return node
+
+    def changed(self, other: "PersistentTree", path: Sequence[str]) -> bool:
+        """
+        Returns whether the subtree at path differs from (or is missing in) other
+        """
+        node = self.subtree(path)
+        return node is None or node != other.subtree(path)
+
+    def changed_paths(self, other: "PersistentTree") -> Iterator[Section]:
+        """
+        Yields the paths of nodes in this tree whose subtree is not in other.
+        Shared subtrees are skipped without being visited.
+        """
+        stack = [((), self.roots, other.roots)]
+        while stack:
+            path, nodes, other_nodes = stack.pop()
+            by_description = {node.description: node for node in other_nodes}
+            shared = {node.digest for node in other_nodes}
+            for node in nodes:
+                if node.digest in shared:
+                    continue
+                node_path = path + (node.description,)
+                yield node_path
+                other_node = by_description.get(node.description)
+                other_children = other_node.children if other_node else ()
+                stack.append((node_path, node.children, other_children))
+
+    def to_tree(self) -> Tree[Task]:
+        nodes = []
+        stack = [(root, None) for root in self.roots]
+        while stack:
+            frozen, parent = stack.pop()
+            node = Node(frozen.task)
+            if parent is not None:
+                Node.adopt(parent, node)
+            nodes.append(node)
+            stack.extend((child, node) for child in frozen.children)
+        return Tree(nodes)
@@ -0,0 +1,348 @@
+"""
+A compact binary format for parsed plans and history statistics.
+
+Each file holds a header, a table of contents and a list of columns:
+
+    header   magic (4s), format version (H), kind (H), row count (I)
+    contents (offset, length) pairs (II) for each column
+    columns  little-endian arrays, each padded to an 8 byte boundary
+
+Trees are stored in pre-order, so a parent always comes before its children,
+with siblings in document order.
+Descriptions and dependencies are indexes into a single table of unique strings.
+Loading only reads the header; columns are memoryviews onto the (mmapped) file.
+"""
+
+from array import array
+from collections.abc import Sequence
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import BinaryIO, Union
+import json
+import mmap
+import struct
+import sys
+
+from .count import TaskStatistics
+from .git.history import GitHistory
+from .task import Task
+from .tree import Node, Tree
+
+MAGIC = b"MDPL"
+FORMAT_VERSION = 1
+
+KIND_TREE = 1
+KIND_HISTORY = 2
+
+HEADER = struct.Struct("<4sHHI")
+CONTENTS_ENTRY = struct.Struct("<II")
+ALIGNMENT = 8
+
+# column typecodes, in file order
+TREE_COLUMNS = [
+    "i",  # parent index (-1 for roots)
+    "B",  # done flag
+    "I",  # description string index
+    "I",  # dependency offsets (rows + 1)
+    "I",  # dependency string indexes
+    "I",  # string offsets (strings + 1)
+    "B",  # string data (utf-8)
+]
+HISTORY_COLUMNS = [
+    "q",  # commit time (seconds since epoch)
+    "i",  # commit time offset (minutes)
+    "I",  # total tasks
+    "I",  # completed tasks
+]
+
+
+class StringTable:
+    """
+    Collects unique strings, assigning each an index
+    """
+
+    def __init__(self):
+        self.indexes = {}
+        self.strings = []
+
+    def add(self, string: str) -> int:
+        index = self.indexes.get(string)
+        if index is None:
+            index = len(self.strings)
+            self.indexes[string] = index
+            self.strings.append(string)
+        return index
+
+    def columns(self) -> tuple[array, bytes]:
+        offsets = array("I", [0])
+        data = bytearray()
+        for string in self.strings:
+            data += string.encode("utf-8")
+            offsets.append(len(data))
+        return offsets, bytes(data)
+
+
+def pad(length: int) -> int:
+    return -length % ALIGNMENT
+
+
+def pack(kind: int, rows: int, columns: list) -> bytes:
+    chunks = []
+    for column in columns:
+        if isinstance(column, array):
+            if sys.byteorder == "big":
+                column = array(column.typecode, column)
+                column.byteswap()
+            column = column.tobytes()
+        chunks.append(column)
+
+    offset = HEADER.size + CONTENTS_ENTRY.size * len(chunks)
+    offset += pad(offset)
+    contents = []
+    for chunk in chunks:
+        contents.append(CONTENTS_ENTRY.pack(offset, len(chunk)))
+        offset += len(chunk) + pad(len(chunk))
+
+    out = bytearray(HEADER.pack(MAGIC, FORMAT_VERSION, kind, rows))
+    out += b"".join(contents)
+    for chunk in [b""] + chunks:
+        out += bytes(pad(len(out)))
+        out += chunk
+    return bytes(out)
+
+
+def unpack(buffer, typecodes: list[str]) -> tuple[int, int, list]:
+    view = memoryview(buffer)
+    magic, version, kind, rows = HEADER.unpack_from(view)
+    if magic != MAGIC:
+        raise ValueError("Not a markdown-plan binary file")
+    if version > FORMAT_VERSION:
+        raise ValueError(f"Unsupported format version: {version}")
+    columns = []
+    for i, typecode in enumerate(typecodes):
+        offset, length = CONTENTS_ENTRY.unpack_from(
+            view, HEADER.size + CONTENTS_ENTRY.size * i
+        )
+        column = view[offset : offset + length]
+        if sys.byteorder == "little":
+            column = column.cast(typecode)
+        else:
+            column = array(typecode, column.tobytes())
+            column.byteswap()
+        columns.append(column)
+    return kind, rows, columns
+
+
+def read_kind(buffer) -> int:
+    magic, _, kind, _ = HEADER.unpack_from(buffer)
+    if magic != MAGIC:
+        raise ValueError("Not a markdown-plan binary file")
+    return kind
+
+
+def preorder(tree: Tree[Task]) -> list[Node[Task]]:
+    # siblings in document order, so a tree always packs to the same bytes
+    nodes = []
+    stack = tree.in_order(tree.roots)[::-1]
+    while stack:
+        node = stack.pop()
+        nodes.append(node)
+        stack.extend(reversed(tree.in_order(node.children)))
+    return nodes
+
+
+def pack_tree(tree: Tree[Task]) -> bytes:
+    nodes = preorder(tree)
+    indexes = {node: i for i, node in enumerate(nodes)}
+    strings = StringTable()
+    parents = array("i")
+    done = array("B")
+    descriptions = array("I")
+    dependency_offsets = array("I", [0])
+    dependencies = array("I")
+    for node in nodes:
+        task = node.value
+        parents.append(-1 if node.parent is None else indexes[node.parent])
+        done.append(task.done)
+        descriptions.append(strings.add(task.description))
+        dependencies.extend(strings.add(dep) for dep in task.dependencies)
+        dependency_offsets.append(len(dependencies))
+    string_offsets, string_data = strings.columns()
+    columns = [
+        parents,
+        done,
+        descriptions,
+        dependency_offsets,
+        dependencies,
+        string_offsets,
+        string_data,
+    ]
+    return pack(KIND_TREE, len(nodes), columns)
+
+
+def pack_history(history: GitHistory) -> bytes:
+    times = array("q")
+    offsets = array("i")
+    totals = array("I")
+    completions = array("I")
+    for version in history:
+        try:
+            statistics = version.task_statistics
+        except Exception as e:
+            # Skip bad commits, just like GitHistory.to_json
+            print(e)
+            continue
+        times.append(version.commit.commit_time)
+        offsets.append(version.commit.commit_time_offset)
+        totals.append(statistics.total)
+        completions.append(statistics.completed)
+    return pack(KIND_HISTORY, len(times), [times, offsets, totals, completions])
+
+
+class PackedTree(Sequence):
+    """
+    A read-only view of a serialized Tree[Task], indexed in pre-order
+    """
+
+    def __init__(self, buffer):
+        _, self.rows, columns = unpack(buffer, TREE_COLUMNS)
+        (
+            self.parents,
+            self.done,
+            self.descriptions,
+            self.dependency_offsets,
+            self.dependencies,
+            self.string_offsets,
+            self.string_data,
+        ) = columns
+
+    def __len__(self):
+        return self.rows
+
+    def __getitem__(self, index) -> Task:
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self.rows))]
+        if not -self.rows <= index < self.rows:
+            raise IndexError(index)
+        index %= self.rows
+        start = self.dependency_offsets[index]
+        end = self.dependency_offsets[index + 1]
+        return Task(
+            description=self.string(self.descriptions[index]),
+            done=bool(self.done[index]),
+            dependencies=[self.string(i) for i in self.dependencies[start:end]],
+        )
+
+    def string(self, index: int) -> str:
+        start = self.string_offsets[index]
+        end = self.string_offsets[index + 1]
+        return str(self.string_data[start:end], "utf-8")
+
+    def to_tree(self) -> Tree[Task]:
+        nodes = []
+        for i, task in enumerate(self):
+            node = Node(task)
+            parent = self.parents[i]
+            if parent >= 0:
+                Node.adopt(nodes[parent], node)
+            nodes.append(node)
+        return Tree(nodes)
+
+
+class PackedVersion:
+    """
+    A version loaded from a serialized history (without its commit)
+    """
+
+    commit_time: int
+    commit_time_offset: int
+    task_statistics: TaskStatistics
+
+    def __init__(self, commit_time, commit_time_offset, task_statistics):
+        self.commit_time = commit_time
+        self.commit_time_offset = commit_time_offset
+        self.task_statistics = task_statistics
+
+    @property
+    def datetime(self) -> datetime:
+        tz = timezone(timedelta(minutes=self.commit_time_offset))
+        return datetime.fromtimestamp(self.commit_time, tz)
+
+    def as_data(self):
+        data = {
+            "date": self.datetime.isoformat(),
+            "tasks": self.task_statistics.as_data(),
+        }
+        return data
+
+
+class PackedHistory(Sequence):
+    """
+    A read-only view of serialized history statistics, in chronological order
+    """
+
+    def __init__(self, buffer):
+        _, self.rows, columns = unpack(buffer, HISTORY_COLUMNS)
+        self.times, self.offsets, self.totals, self.completions = columns
+
+    def __len__(self):
+        return self.rows
+
+    def __getitem__(self, index) -> PackedVersion:
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self.rows))]
+        if not -self.rows <= index < self.rows:
+            raise IndexError(index)
+        index %= self.rows
+        statistics = TaskStatistics(
+            total=self.totals[index], completed=self.completions[index]
+        )
+        return PackedVersion(self.times[index], self.offsets[index], statistics)
+
+    def to_json(self) -> str:
+        data = {"versions": [version.as_data() for version in self]}
+        return json.dumps(data)
+
+
+Packable = Union[Tree[Task], GitHistory]
+Packed = Union[PackedTree, PackedHistory]
+
+
+def dumps(obj: Packable) -> bytes:
+    if isinstance(obj, Tree):
+        return pack_tree(obj)
+    if isinstance(obj, GitHistory):
+        return pack_history(obj)
+    raise TypeError(f"Cannot serialize {type(obj).__name__}")
+
+
+def dump(obj: Packable, file: Union[str, Path, BinaryIO]):
+    data = dumps(obj)
+    if isinstance(file, (str, Path)):
+        Path(file).write_bytes(data)
+    else:
+        file.write(data)
+
+
+def loads(buffer) -> Packed:
+    """
+    Returns a view onto buffer (bytes, mmap or anything supporting memoryview).
+    The buffer is not copied, so it must stay unchanged while the view is in use.
+    """
+    kind = read_kind(buffer)
+    if kind == KIND_TREE:
+        return PackedTree(buffer)
+    if kind == KIND_HISTORY:
+        return PackedHistory(buffer)
+    raise ValueError(f"Unknown kind: {kind}")
+
+
+def load(file: Union[str, Path, BinaryIO]) -> Packed:
+    """
+    Memory-maps the file and returns a view onto it.
+    """
+    if isinstance(file, (str, Path)):
+        with open(file, "rb") as f:
+            return load(f)
+    buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    return loads(buffer)
@@ -2,6 +2,7 @@ from pytest import fixture
 from tempfile import TemporaryDirectory
 from os.path import dirname
 from pathlib import Path
+import pygit2
 import tarfile
 
 this_folder = dirname(__file__)
@@ -32,6 +33,27 @@ def clone_repo(config, folder):
     return Path(folder) / config["repo_folder"]
 
 
+def commit_plan(repo_path, plan_path, text, ref="HEAD", parents=None, time=None):
+    """
+    Commits a new version of the plan, returning the commit id.
+    By default, the commit is added on top of HEAD.
+    The plan must be at the top level of the repo.
+    """
+    repo = pygit2.Repository(repo_path)
+    relpath = str(Path(plan_path).relative_to(repo_path))
+    blob = repo.create_blob(text.encode("utf-8"))
+    builder = repo.TreeBuilder(repo.head.peel(pygit2.Commit).tree)
+    builder.insert(relpath, blob, pygit2.GIT_FILEMODE_BLOB)
+    tree = builder.write()
+    if time is None:
+        signature = pygit2.Signature("Test", "test@example.com")
+    else:
+        signature = pygit2.Signature("Test", "test@example.com", time, 0)
+    if parents is None:
+        parents = [repo.head.target]
+    return repo.create_commit(ref, signature, signature, "update plan", tree, parents)
+
+
 @fixture
 def repo():
     with TemporaryDirectory() as tmpdir:
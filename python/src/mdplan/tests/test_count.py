@@ -1,4 +1,12 @@
-from ..count import count_all_tasks, count_remaining_tasks
+from ..count import (
+    TaskStatistics,
+    count_all_tasks,
+    count_remaining_tasks,
+    count_tasks,
+    rollup,
+    section_statistics,
+)
+from ..parse import parse_tree
 
 
 def test_counts_a_flat_list():
@@ -51,3 +59,51 @@ def test_counts_all_tasks():
     num = count_all_tasks(plan)
 
     assert num == 3
+
+
+rollup_plan = """
+# Plan
+
+## Backend
+
+- [x] write api
+  - api docs
+- deploy api
+
+## Frontend
+
+- write ui
+- [x] deploy ui
+"""
+
+
+def test_rolls_up_statistics_for_every_task():
+    tree = parse_tree(rollup_plan)
+    statistics = rollup(tree)
+    by_description = {node.value.description: statistics[node] for node in tree.nodes}
+    assert by_description["Plan"] == TaskStatistics(total=4, completed=2)
+    assert by_description["Backend"] == TaskStatistics(total=2, completed=1)
+    assert by_description["write api"] == TaskStatistics(total=1, completed=1)
+    assert by_description["deploy api"] == TaskStatistics(total=1, completed=0)
+
+
+def test_does_not_mark_tasks_done_when_rolling_up():
+    tree = parse_tree(rollup_plan)
+    rollup(tree)
+    docs = [node for node in tree.nodes if node.value.description == "api docs"][0]
+    assert not docs.value.done
+
+
+def test_counts_tasks_in_a_tree():
+    tree = parse_tree(rollup_plan)
+    assert count_tasks(tree) == TaskStatistics(total=4, completed=2)
+
+
+def test_counts_tasks_per_section():
+    tree = parse_tree(rollup_plan)
+    sections = section_statistics(tree, depth=2)
+    assert sections == {
+        ("Plan",): TaskStatistics(total=4, completed=2),
+        ("Plan", "Backend"): TaskStatistics(total=2, completed=1),
+        ("Plan", "Frontend"): TaskStatistics(total=2, completed=1),
+    }
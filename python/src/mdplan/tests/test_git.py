@@ -1,7 +1,10 @@
 import json
+import pygit2
+
+from pytest import fixture, raises
 
 from .fixtures import *
-from ..git.history import GitHistory
+from ..git.history import GitHistory, find_renames
 
 
 def test_finds_multiple_versions(plan):
@@ -70,4 +73,185 @@ def test_renders_correct_json_history(plan):
 
 def test_does_not_crash_if_encountering_unparseable_commit(plan_with_bad_commit):
     history = GitHistory(plan_with_bad_commit)
-    json = history.to_json() # This could fail because one of the commit has a bad indent. See git log in test repo folder.
\ No newline at end of file
+    json = history.to_json() # This could fail because one of the commit has a bad indent. See git log in test repo folder.
+
+DAY = 24 * 60 * 60
+
+
+@fixture
+def merged_plan(repo, plan):
+    """
+    Adds a merged feature branch and an unmerged branch to the example repo
+    """
+    base = pygit2.Repository(repo).head.peel(pygit2.Commit)
+    time = base.commit_time
+    feature = commit_plan(
+        repo, plan, "- feature\n", ref="refs/heads/feature", time=time + DAY
+    )
+    commit_plan(
+        repo,
+        plan,
+        "- main\n- feature\n",
+        parents=[base.id, feature],
+        time=time + 2 * DAY,
+    )
+    commit_plan(
+        repo,
+        plan,
+        "- other\n",
+        ref="refs/heads/other",
+        parents=[base.id],
+        time=time + 3 * DAY,
+    )
+    return plan
+
+
+def test_walks_merged_branches_by_default(merged_plan):
+    sources = [v.source for v in GitHistory(merged_plan)]
+    assert "- feature\n" in sources
+    assert "- other\n" not in sources
+
+
+def test_walks_first_parents_only(merged_plan):
+    history = GitHistory(merged_plan, walk="first-parent")
+    sources = [v.source for v in history]
+    assert len(history) == len(GitHistory(merged_plan)) - 1
+    assert "- feature\n" not in sources
+    assert sources[-1] == "- main\n- feature\n"
+
+
+def test_walks_all_refs(merged_plan):
+    history = GitHistory(merged_plan, walk="all-refs")
+    sources = [v.source for v in history]
+    assert len(history) == len(GitHistory(merged_plan)) + 1
+    assert sources[-1] == "- other\n"
+
+
+def test_orders_topologically(merged_plan):
+    history = GitHistory(merged_plan, walk="all-refs", order="topological")
+    sources = [v.source for v in history]
+    assert sources.index("- feature\n") < sources.index("- main\n- feature\n")
+    assert sources[0].startswith("# Test plan")
+
+
+def test_rejects_unknown_walks(plan):
+    with raises(ValueError):
+        GitHistory(plan, walk="sideways")
+
+
+def test_rejects_unknown_orders(plan):
+    with raises(ValueError):
+        GitHistory(plan, order="random")
+
+
+def test_renders_section_statistics(plan):
+    history = GitHistory(plan)
+    data = json.loads(history.to_json(section_depth=1))
+    for version in data["versions"]:
+        sections = version["sections"]
+        assert sum(s["tasks"]["total"] for s in sections) == version["tasks"]["total"]
+
+
+def test_freezes_versions(plan):
+    history = GitHistory(plan)
+    trees = [v.persistent_tree for v in history]
+    assert trees[0] == history[0].persistent_tree
+    assert trees[0] != trees[-1]
+
+
+def rename_plan(repo_path, old_path, new_path):
+    repo = pygit2.Repository(repo_path)
+    head = repo.head.peel(pygit2.Commit)
+    old_name = Path(old_path).name
+    blob = head.tree[old_name].id
+    builder = repo.TreeBuilder(head.tree)
+    builder.remove(old_name)
+    builder.insert(Path(new_path).name, blob, pygit2.GIT_FILEMODE_BLOB)
+    signature = pygit2.Signature("Test", "test@example.com")
+    repo.create_commit(
+        "HEAD", signature, signature, "rename", builder.write(), [head.id]
+    )
+
+
+def test_follows_renames(repo, plan):
+    before = GitHistory(plan)
+    renamed = str(Path(repo) / "renamed.plan.md")
+    rename_plan(repo, plan, renamed)
+    history = GitHistory(renamed)
+    assert len(history) == len(before) + 1
+    assert history[0].source == before[0].source
+
+
+def test_does_not_follow_renames_when_disabled(repo, plan):
+    renamed = str(Path(repo) / "renamed.plan.md")
+    rename_plan(repo, plan, renamed)
+    assert len(GitHistory(renamed, follow=False)) == 1
+
+
+def test_only_detects_renames_where_the_plan_disappears(repo, plan):
+    renamed = str(Path(repo) / "renamed.plan.md")
+    rename_plan(repo, plan, renamed)
+    find_renames.cache_clear()
+    GitHistory(renamed)
+    assert find_renames.cache_info().misses == 1
+    GitHistory(renamed)
+    assert find_renames.cache_info().misses == 1
+
+
+def delete_plan(repo_path, plan_path, ref="HEAD", parents=None):
+    """
+    Commits the removal of the plan, returning the commit id.
+    By default, the commit is added on top of HEAD.
+    """
+    repo = pygit2.Repository(repo_path)
+    if parents is None:
+        parents = [repo.head.target]
+    builder = repo.TreeBuilder(repo[parents[0]].peel(pygit2.Commit).tree)
+    builder.remove(Path(plan_path).name)
+    signature = pygit2.Signature("Test", "test@example.com")
+    return repo.create_commit(
+        ref, signature, signature, "delete", builder.write(), parents
+    )
+
+
+def test_keeps_history_from_before_a_deletion(repo, plan):
+    before = GitHistory(plan)
+    delete_plan(repo, plan)
+    commit_plan(repo, plan, "- [ ] start over\n")
+    history = GitHistory(plan)
+    assert len(history) == len(before) + 1
+    assert history[0].source == before[0].source
+
+
+def test_prefers_the_path_found_in_each_commit_across_merges(repo, plan):
+    before = GitHistory(plan)
+    base = pygit2.Repository(repo).head.target
+    deleted = delete_plan(repo, plan, ref=None, parents=[base])
+    renamed = str(Path(repo) / "renamed.plan.md")
+    rename_plan(repo, plan, renamed)
+    head = pygit2.Repository(repo).head.target
+    commit_plan(repo, renamed, "- [x] merged\n", parents=[head, deleted])
+    history = GitHistory(renamed, order="topological")
+    assert len(history) == len(before) + 2
+    assert history[0].source == before[0].source
+
+
+def test_only_detects_renames_where_a_late_plan_appears():
+    with TemporaryDirectory() as tmpdir:
+        repo = pygit2.init_repository(tmpdir)
+        signature = pygit2.Signature("Test", "test@example.com")
+        builder = repo.TreeBuilder()
+        parents = []
+        for i in range(5):
+            blob = repo.create_blob(f"file {i}".encode("utf-8"))
+            builder.insert(f"file{i}.txt", blob, pygit2.GIT_FILEMODE_BLOB)
+            commit = repo.create_commit(
+                "HEAD", signature, signature, "add file", builder.write(), parents
+            )
+            parents = [commit]
+        plan = str(Path(tmpdir) / "late.plan.md")
+        commit_plan(tmpdir, plan, "- [ ] task\n")
+        commit_plan(tmpdir, plan, "- [x] task\n")
+        find_renames.cache_clear()
+        assert len(GitHistory(plan)) == 2
+        assert find_renames.cache_info().misses == 1
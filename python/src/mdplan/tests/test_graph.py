@@ -0,0 +1,63 @@
+from pytest import raises
+
+from ..graph import graph_lines
+from ..parse import parse_tree
+
+plan = """
+# Plan
+- [x] write api
+  - api docs
+- deploy @(write api)
+"""
+
+
+def labels(lines):
+    return sorted(line.split('"')[1] for line in lines if "label=" in line)
+
+
+class TestDot:
+    def test_outputs_every_task(self):
+        lines = list(graph_lines(parse_tree(plan)))
+        assert lines[0] == "digraph plan {"
+        assert lines[-1] == "}"
+        assert labels(lines) == ["Plan", "api docs", "deploy", "write api"]
+
+    def test_draws_dependencies_as_dashed_edges(self):
+        lines = list(graph_lines(parse_tree(plan)))
+        assert len([line for line in lines if "style=dashed" in line]) == 1
+
+    def test_outputs_tasks_in_document_order(self):
+        lines = list(graph_lines(parse_tree(plan)))
+        order = [line.split('"')[1] for line in lines if "label=" in line]
+        assert order == ["Plan", "write api", "api docs", "deploy"]
+        assert lines == list(graph_lines(parse_tree(plan)))
+
+    def test_escapes_labels(self):
+        lines = list(graph_lines(parse_tree('- say "hi"')))
+        assert '[label="say \\"hi\\""];' in lines[-2]
+
+    def test_collapses_done_tasks(self):
+        lines = list(graph_lines(parse_tree(plan), collapse_done=True))
+        assert labels(lines) == ["Plan", "deploy", "write api"]
+
+    def test_cuts_off_at_a_depth(self):
+        lines = list(graph_lines(parse_tree(plan), max_depth=1))
+        assert labels(lines) == ["Plan"]
+        assert not [line for line in lines if "->" in line]
+
+    def test_notes_unknown_dependencies(self):
+        lines = list(graph_lines(parse_tree("- a @(nothing)")))
+        assert "  // unknown dependency: nothing" in lines
+
+
+class TestMermaid:
+    def test_outputs_a_flowchart(self):
+        lines = list(graph_lines(parse_tree(plan), format="mermaid"))
+        assert lines[0] == "flowchart TD"
+        assert len([line for line in lines if "-.->" in line]) == 1
+        assert len([line for line in lines if "-->" in line]) == 3
+
+
+def test_rejects_unknown_formats():
+    with raises(ValueError):
+        list(graph_lines(parse_tree(plan), format="svg"))
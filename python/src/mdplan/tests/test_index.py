@@ -0,0 +1,78 @@
+from ..index import TaskIndex
+from ..parse import parse_tree
+
+plan = """
+# Plan
+
+## Backend
+
+- [x] write api
+  - api docs
+- deploy api
+
+## Frontend
+
+- write ui
+- [ ] deploy ui
+"""
+
+
+def descriptions(nodes):
+    return sorted(node.value.description for node in nodes)
+
+
+class TestLookups:
+    def test_finds_exact_matches(self):
+        index = TaskIndex(parse_tree(plan))
+        assert descriptions(index.exact("deploy ui")) == ["deploy ui"]
+        assert index.exact("deploy") == []
+
+    def test_finds_prefix_matches(self):
+        index = TaskIndex(parse_tree(plan))
+        assert descriptions(index.prefix("deploy")) == ["deploy api", "deploy ui"]
+
+    def test_finds_substring_matches(self):
+        index = TaskIndex(parse_tree(plan))
+        assert descriptions(index.substring("api")) == [
+            "api docs",
+            "deploy api",
+            "write api",
+        ]
+
+    def test_finds_short_substring_matches(self):
+        index = TaskIndex(parse_tree(plan))
+        assert descriptions(index.substring("ui")) == ["deploy ui", "write ui"]
+
+    def test_returns_matches_in_document_order(self):
+        index = TaskIndex(parse_tree(plan))
+        matches = [node.value.description for node in index.substring("")]
+        assert matches == [
+            "Plan",
+            "Backend",
+            "write api",
+            "api docs",
+            "deploy api",
+            "Frontend",
+            "write ui",
+            "deploy ui",
+        ]
+
+
+class TestFilters:
+    def test_filters_by_completion(self):
+        index = TaskIndex(parse_tree(plan))
+        assert descriptions(index.substring("api", done=True)) == [
+            "api docs",
+            "write api",
+        ], "children of done tasks count as done"
+        assert descriptions(index.substring("api", done=False)) == ["deploy api"]
+
+    def test_filters_by_ancestor(self):
+        index = TaskIndex(parse_tree(plan))
+        frontend = index.exact("Frontend")[0]
+        assert descriptions(index.prefix("deploy", under=frontend)) == ["deploy ui"]
+
+    def test_excludes_the_ancestor_itself(self):
+        index = TaskIndex(parse_tree(plan))
+        backend = index.exact("Backend")[0]
+        assert index.exact("Backend", under=backend) == []
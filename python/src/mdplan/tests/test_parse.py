@@ -57,6 +57,29 @@ class TestParseTask:
         assert "world" in task.dependencies
         assert "universe" in task.dependencies
 
+    def test_description_excludes_asterisk_marker(self):
+        line = "* hello"
+        task = parse_task(line)
+        assert task.description == "hello"
+
+
+class TestParseVersions:
+    def test_shares_descriptions_across_versions(self):
+        before = parse_tree("- [ ] write the " + "docs")
+        after = parse_tree("- [x] write the " + "docs")
+        assert (
+            before.roots.pop().value.description is after.roots.pop().value.description
+        )
+
+    def test_does_not_share_tasks_across_versions(self):
+        line = "- shared line @(dependency)"
+        a = parse_tree(line).roots.pop().value
+        b = parse_tree(line).roots.pop().value
+        a.done = True
+        a.dependencies.append("other")
+        assert not b.done
+        assert b.dependencies == ["dependency"]
+
 
 class TestParseTree:
     def test_contains_appropriate_leaves(self):
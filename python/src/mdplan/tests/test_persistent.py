@@ -0,0 +1,86 @@
+from pytest import raises
+
+from ..parse import parse_tree
+from ..persistent import NodeStore
+
+v1 = """
+# Plan
+
+## Backend
+
+- write api
+  - api docs
+- deploy api
+
+## Frontend
+
+- write ui
+- deploy ui
+"""
+
+v2 = v1.replace("- deploy ui", "- [x] deploy ui")
+
+
+def describe(tree):
+    return sorted(
+        (
+            node.value.description,
+            node.value.done,
+            node.parent.value.description if node.parent else None,
+        )
+        for node in tree.nodes
+    )
+
+
+def test_shares_unchanged_subtrees():
+    store = NodeStore()
+    a = store.freeze(parse_tree(v1))
+    b = store.freeze(parse_tree(v2))
+    assert a.subtree(["Plan", "Backend"]) is b.subtree(["Plan", "Backend"])
+    assert a.subtree(["Plan", "Frontend"]) is not b.subtree(["Plan", "Frontend"])
+
+
+def test_stores_only_changed_nodes():
+    store = NodeStore()
+    a = store.freeze(parse_tree(v1))
+    size = len(store)
+    b = store.freeze(parse_tree(v2))
+    # deploy ui, Frontend and Plan changed
+    assert len(store) == size + 3
+
+
+def test_compares_equal_versions():
+    store = NodeStore()
+    assert store.freeze(parse_tree(v1)) == store.freeze(parse_tree(v1))
+    assert store.freeze(parse_tree(v1)) != store.freeze(parse_tree(v2))
+
+
+def test_finds_changed_subtrees():
+    store = NodeStore()
+    a = store.freeze(parse_tree(v1))
+    b = store.freeze(parse_tree(v2))
+    assert b.changed(a, ["Plan", "Frontend"])
+    assert not b.changed(a, ["Plan", "Backend"])
+    assert b.changed(a, ["Plan", "Missing"])
+
+
+def test_lists_changed_paths():
+    store = NodeStore()
+    a = store.freeze(parse_tree(v1))
+    b = store.freeze(parse_tree(v2))
+    assert sorted(b.changed_paths(a)) == [
+        ("Plan",),
+        ("Plan", "Frontend"),
+        ("Plan", "Frontend", "deploy ui"),
+    ]
+
+
+def test_converts_back_to_a_tree():
+    tree = parse_tree(v2)
+    assert describe(NodeStore().freeze(tree).to_tree()) == describe(tree)
+
+
+def test_cannot_be_modified():
+    node = NodeStore().freeze(parse_tree(v1)).roots[0]
+    with raises(AttributeError):
+        node.done = True
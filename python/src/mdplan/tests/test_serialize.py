@@ -0,0 +1,79 @@
+import json
+
+from pytest import raises
+
+from .fixtures import *
+from ..git.history import GitHistory
+from ..parse import parse_tree
+from ..serialize import PackedHistory, PackedTree, dump, dumps, load, loads
+
+example_plan = """
+# Plan
+
+1. [x] first @(second)
+   - child
+   - [x] done child
+2. second
+   - ünïcode
+"""
+
+
+def describe(tree):
+    return sorted(
+        (
+            node.value.description,
+            node.value.done,
+            tuple(node.value.dependencies),
+            node.parent.value.description if node.parent else None,
+        )
+        for node in tree.nodes
+    )
+
+
+class TestTree:
+    def test_round_trips_a_tree(self):
+        tree = parse_tree(example_plan)
+        packed = loads(dumps(tree))
+        assert isinstance(packed, PackedTree)
+        assert len(packed) == len(tree.nodes)
+        assert describe(packed.to_tree()) == describe(tree)
+
+    def test_packs_in_document_order(self):
+        data = dumps(parse_tree(example_plan))
+        assert data == dumps(parse_tree(example_plan))
+        descriptions = [task.description for task in loads(data)]
+        assert descriptions == [
+            "Plan",
+            "first",
+            "child",
+            "done child",
+            "second",
+            "ünïcode",
+        ]
+
+    def test_stores_parents_before_children(self):
+        packed = loads(dumps(parse_tree(example_plan)))
+        assert all(packed.parents[i] < i for i in range(len(packed)))
+
+    def test_loads_from_a_file(self, tmp_path):
+        tree = parse_tree(example_plan)
+        path = tmp_path / "plan.mdplan"
+        dump(tree, path)
+        assert describe(load(path).to_tree()) == describe(tree)
+
+    def test_rejects_other_files(self):
+        with raises(ValueError):
+            loads(b"not a plan at all")
+
+
+class TestHistory:
+    def test_round_trips_history_statistics(self, plan):
+        history = GitHistory(plan)
+        packed = loads(dumps(history))
+        assert isinstance(packed, PackedHistory)
+        assert packed.to_json() == history.to_json()
+
+    def test_skips_unparseable_commits(self, plan_with_bad_commit):
+        history = GitHistory(plan_with_bad_commit)
+        packed = loads(dumps(history))
+        assert len(json.loads(packed.to_json())["versions"]) == len(packed)
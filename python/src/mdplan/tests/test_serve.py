@@ -0,0 +1,63 @@
+from http.client import HTTPConnection
+from threading import Thread
+
+from pytest import fixture
+
+from .fixtures import *
+from ..git.history import GitHistory
+from ..git.serve import GitServer
+
+
+@fixture
+def server(plan):
+    server = GitServer(plan, port=0)
+    thread = Thread(target=server.serve_forever, args=(0.01,), daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def get(server, path, headers={}):
+    host, port = server.server_address[:2]
+    connection = HTTPConnection(host, port)
+    connection.request("GET", path, headers=headers)
+    response = connection.getresponse()
+    body = response.read().decode("utf-8")
+    connection.close()
+    return response, body
+
+
+def test_serves_history_json(server, plan):
+    response, body = get(server, "/history")
+    assert response.status == 200
+    assert body == GitHistory(plan).to_json()
+
+
+def test_serves_plot_page(server):
+    response, body = get(server, "/plot")
+    assert response.status == 200
+    assert "<html" in body.lower()
+
+
+def test_answers_not_modified_for_matching_etag(server):
+    response, _ = get(server, "/statistics")
+    etag = response.getheader("ETag")
+    response, body = get(server, "/statistics", {"If-None-Match": etag})
+    assert response.status == 304
+    assert body == ""
+
+
+def test_recomputes_when_repo_moves(server, repo, plan):
+    response, _ = get(server, "/history")
+    etag = response.getheader("ETag")
+    commit_plan(repo, plan, "- one more task\n")
+    response, body = get(server, "/history", {"If-None-Match": etag})
+    assert response.status == 200
+    assert response.getheader("ETag") != etag
+    assert body == GitHistory(plan).to_json()
+
+
+def test_returns_not_found_for_unknown_paths(server):
+    response, _ = get(server, "/nothing")
+    assert response.status == 404
@@ -0,0 +1,92 @@
+"""
+Checks that parsing and tree algorithms scale linearly.
+
+Set MDPLAN_STRESS_TASKS (e.g. to 1000000) to stress larger plans.
+"""
+
+import gc
+import os
+import time
+
+from ..count import count_remaining_tasks, trickle_completion
+from ..index import TaskIndex
+from ..parse import parse_tree
+from ..serialize import dumps, loads
+from ..task import Task
+from ..tree import build_tree_from_indents
+
+NUM_TASKS = int(os.environ.get("MDPLAN_STRESS_TASKS", 50_000))
+DEPTH = 10_000
+
+
+def make_plan(num_tasks):
+    # a header per 1000 tasks, each holding lists nested up to 4 levels deep
+    lines = []
+    for i in range(num_tasks):
+        if i % 1000 == 0:
+            lines.append(f"## section {i}")
+        else:
+            done = "[x] " if i % 7 == 0 else ""
+            lines.append("  " * (i % 5) + f"- {done}task {i}")
+    return "\n".join(lines)
+
+
+def timed(fn, *args):
+    # garbage collection pauses make timings of small inputs too noisy
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        fn(*args)
+        return time.perf_counter() - start
+    finally:
+        gc.enable()
+
+
+def make_chain(depth):
+    tasks = [
+        Task(description=f"task {i}", done=False, dependencies=[]) for i in range(depth)
+    ]
+    return build_tree_from_indents(tasks, range(depth))
+
+
+class TestLargePlans:
+    def test_counts_large_plans(self):
+        plan = make_plan(NUM_TASKS)
+        assert count_remaining_tasks(plan) > 0
+
+    def test_parses_in_linear_time(self):
+        small = make_plan(NUM_TASKS // 10)
+        large = make_plan(NUM_TASKS)
+        small_time = min(timed(parse_tree, small) for _ in range(3))
+        large_time = timed(parse_tree, large)
+        # quadratic parsing would take ~100x longer
+        assert large_time < 30 * small_time
+
+
+class TestDeepPlans:
+    def test_builds_deep_trees_in_linear_time(self):
+        small_time = min(timed(make_chain, DEPTH // 10) for _ in range(3))
+        large_time = min(timed(make_chain, DEPTH) for _ in range(3))
+        assert large_time < 30 * small_time
+
+    def test_trickles_completion_through_deep_trees(self):
+        tree = make_chain(DEPTH)
+        root = tree.roots.pop()
+        root.value.done = True
+        trickle_completion(tree)
+        assert all(node.value.done for node in tree.nodes)
+
+    def test_parses_deep_plans(self):
+        plan = "\n".join(" " * i + f"- task {i}" for i in range(DEPTH))
+        tree = parse_tree(plan)
+        assert len(tree.leaves) == 1
+
+    def test_indexes_deep_trees(self):
+        tree = make_chain(DEPTH)
+        index = TaskIndex(tree)
+        root = tree.roots.pop()
+        assert len(index.prefix("task", under=root)) == DEPTH - 1
+
+    def test_serializes_deep_trees(self):
+        tree = make_chain(DEPTH)
+        assert len(loads(dumps(tree)).to_tree().leaves) == 1
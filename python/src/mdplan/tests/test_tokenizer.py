@@ -0,0 +1,58 @@
+import time
+
+from ..tokenizer import BULLET, HEADER, NUMBER, infer_single_indent, tokenize_line
+
+
+class TestTokenizeLine:
+    def test_ignores_non_task_lines(self):
+        assert tokenize_line("some paragraph") is None
+        assert tokenize_line("***") is None
+        assert tokenize_line("1.5 apples") is None
+
+    def test_recognizes_markers(self):
+        assert tokenize_line("# hello").marker == HEADER
+        assert tokenize_line("* hello").marker == BULLET
+        assert tokenize_line("- hello").marker == BULLET
+        assert tokenize_line("12. hello").marker == NUMBER
+
+    def test_calculates_header_levels(self):
+        assert tokenize_line("# hello").level("\t") == -6
+        assert tokenize_line("###### hello").level("\t") == -1
+
+    def test_calculates_list_levels(self):
+        assert tokenize_line("- hello").level("  ") == 0
+        assert tokenize_line("    - hello").level("  ") == 2
+
+    def test_splits_description_and_dependencies(self):
+        token = tokenize_line("  - [x] hello world  @(a, b)")
+        assert token.description == "hello world"
+        assert token.dependencies == ("a", "b")
+
+    def test_only_leading_checkbox_marks_done(self):
+        assert not tokenize_line("- see [x] below").done
+        assert tokenize_line("- see [x] below").description == "see [x] below"
+
+    def test_keeps_unclosed_brackets_in_description(self):
+        token = tokenize_line("- see [link @(and")
+        assert token.description == "see [link @(and"
+        assert token.dependencies == ()
+
+    def test_tokenizes_long_lines_in_linear_time(self):
+        start = time.perf_counter()
+        assert tokenize_line("- a" + " " * 100_000 + "b").description.endswith("b")
+        assert tokenize_line("- a" + " @(" * 100_000).dependencies == ()
+        assert time.perf_counter() - start < 1
+
+    def test_reuses_results_for_repeated_lines(self):
+        line = "- a line seen in many versions"
+        first = tokenize_line(line)
+        hits = tokenize_line.cache_info().hits
+        assert tokenize_line(line) is first
+        assert tokenize_line.cache_info().hits == hits + 1
+
+
+class TestInferSingleIndent:
+    def test_infers_indent(self):
+        lines = ["- a", "    - b", "        - c"]
+        indents = [tokenize_line(line).indent for line in lines]
+        assert infer_single_indent(indents) == "    "
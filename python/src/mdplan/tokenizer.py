@@ -0,0 +1,110 @@
+from functools import lru_cache
+from typing import Iterable, NamedTuple, Optional
+import re
+import sys
+
+from . import utils
+
+HEADER = "header"
+BULLET = "bullet"
+NUMBER = "number"
+
+LINE_PATTERN = re.compile(
+    r"""
+    (?P<indent>[\ \t]*)
+    (?:(?P<header>\#+)|(?P<bullet>[*-])|(?P<number>\d+\.))
+    (?=\ |\s*$)  # the marker must be a word of its own
+    \s*
+    (?:\[(?P<check>[\ x])\])?
+    \s*
+    """,
+    re.VERBOSE,
+)
+
+# consecutive versions of a plan share most of their lines,
+# so the cache only needs to hold a few versions worth of lines
+LINE_CACHE_SIZE = 1 << 16
+
+
+class LineToken(NamedTuple):
+    """
+    The markdown structure of a single task line, independent of the rest of the plan
+    """
+
+    indent: str
+    header: str  # empty for list items
+    marker: str
+    done: bool
+    description: str
+    dependencies: tuple[str, ...]
+
+    def level(self, single_indent: str) -> int:
+        return nesting_level(self.indent, self.header, single_indent)
+
+
+def infer_single_indent(indents: Iterable[str]) -> str:
+    indents = [indent for indent in indents if indent]
+    if not indents:
+        return "\t"  # default
+    chartype = indents[0][0]
+    together = "".join(indents)
+    assert together.count(chartype) == len(together), "Indentation must be consistent"
+    counts = {len(indent) for indent in indents}
+    return utils.gcd(*counts) * chartype
+
+
+def nesting_level(indent: str, header: Optional[str], single_indent: str) -> int:
+    """
+    Returns the nesting level of a task line.
+
+    For headers, it is negative, with -6 being h1 and -1 being h6.
+    For list items, it is non-negative, starting at 0 for no indentation.
+    """
+    if header:
+        return len(header) - 7
+    return indent.count(single_indent)
+
+
+def split_content(line: str, start: int) -> tuple[str, tuple[str, ...]]:
+    """
+    Returns the description and dependencies (`@(...)`) of a line,
+    given where its content starts (after the marker and checkbox).
+    """
+    end = len(line)
+    dependencies = ()
+    i = line.find("@(", start)
+    if i != -1:
+        j = line.find(")", i + 2)
+        if j != -1:
+            end = i
+            splits = line[i + 2 : j].split(",")
+            dependencies = tuple(sys.intern(split.strip()) for split in splits)
+    return sys.intern(line[start:end].rstrip()), dependencies
+
+
+@lru_cache(maxsize=LINE_CACHE_SIZE)
+def tokenize_line(line: str) -> Optional[LineToken]:
+    """
+    Returns the token for a task line, or None if the line is not a task.
+
+    Results are cached, and descriptions are interned, so parsing many versions
+    of a plan only does work for changed lines and stores each description once.
+    Nesting levels depend on the whole plan, see LineToken.level.
+    """
+    match = LINE_PATTERN.match(line)
+    if match is None:
+        return None
+    indent, header, bullet, _, check = match.groups()
+    if header:
+        marker = HEADER
+    else:
+        marker = BULLET if bullet else NUMBER
+    description, dependencies = split_content(line, match.end())
+    return LineToken(
+        indent=indent,
+        header=header or "",
+        marker=marker,
+        done=check == "x",
+        description=description,
+        dependencies=dependencies,
+    )
@@ -1,4 +1,4 @@
-from typing import Generic, Optional, Set, Tuple, TypeVar
+from typing import Generic, Iterable, Optional, Set, Tuple, TypeVar
 
 V = TypeVar("V")
 
@@ -21,9 +21,18 @@ class Node(Generic[V]):
 
 class Tree(Generic[V]):
     nodes: Set[Node[V]]
+    positions: dict[Node[V], int]  # the order nodes were given in
 
     def __init__(self, nodes: list[Node[V]]):
         self.nodes = set(nodes)
+        self.positions = {node: i for i, node in enumerate(nodes)}
+
+    def in_order(self, nodes: Iterable[Node[V]]) -> list[Node[V]]:
+        """
+        Returns the nodes in the order the tree was given them
+        (document order, for a parsed plan)
+        """
+        return sorted(nodes, key=self.positions.__getitem__)
 
     @property
     def leaves(self) -> Set[Node[V]]:
@@ -49,9 +58,12 @@ class TreeBuilder(Generic[V]):
         self.curr_lineage = []
 
     def find_placement_in_lineage(self, indent: int) -> int:
-        i = 0
-        while i < len(self.curr_lineage) and self.curr_lineage[i][1] < indent:
-            i += 1
+        # indents increase along the lineage, so search back from the end:
+        # every ancestor passed over is dropped when the node is placed,
+        # which keeps building a tree linear in the number of nodes
+        i = len(self.curr_lineage)
+        while i > 0 and self.curr_lineage[i - 1][1] >= indent:
+            i -= 1
         return i
 
     def place_in_lineage(self, node: Node[V], indent: int) -> Optional[Ancestor[V]]:
@@ -16,13 +16,10 @@ def find_groups(string, grouper):
     starter = grouper[0]
     finisher = grouper[1]
     groups = []
-    while starter in string:
-        i1 = string.index(starter) + len(starter)
-        i2 = string.index(finisher)
+    i0 = string.find(starter)
+    while i0 != -1:
+        i1 = i0 + len(starter)
+        i2 = string.index(finisher, i1)
         groups.append(string[i1:i2])
-        string = string[i2 + 1 :]
+        i0 = string.find(starter, i2 + len(finisher))
     return groups
-
-
-def pipe(functions):
-    return lambda x: reduce(lambda a, v: v(a), functions, x)